@@ -0,0 +1,100 @@
+import argparse
+import glob
+import os
+import random
+import time
+
+import numpy as np
+from embeddings import PROVIDERS, get_embedding_provider
+from ingest import TRANSCRIPT_DIR, chunk_text
+
+# Compares embedding providers on the local transcripts:
+#   throughput - chunks embedded per second (ingest cost)
+#   latency    - average time to embed a single query (per-request cost)
+#   recall@k   - a random slice of a chunk is used as the query; hit if its chunk is in the top k
+#   similarity - cosine similarity percentiles of the matching chunk vs the best non-matching one,
+#                for calibrating RAG_MIN_SIMILARITY / RAG_RELATIVE_MARGIN in rag_service.py
+# Run from backend/, e.g. `python benchmark_embeddings.py --providers default onnx`
+
+def load_chunks(limit):
+    chunks = []
+    for file_path in sorted(glob.glob(os.path.join(TRANSCRIPT_DIR, "*.txt"))):
+        with open(file_path, "r", encoding="utf-8") as f:
+            chunks.extend(chunk for _, chunk in chunk_text(f.read()))
+        if len(chunks) >= limit:
+            break
+    return chunks[:limit]
+
+def make_queries(chunks, n_queries, query_length, seed):
+    rng = random.Random(seed)
+    targets = rng.sample(range(len(chunks)), min(n_queries, len(chunks)))
+    queries = []
+    for target in targets:
+        chunk = chunks[target]
+        start = rng.randint(0, max(0, len(chunk) - query_length))
+        queries.append(chunk[start:start + query_length])
+    return queries, targets
+
+def benchmark(name, chunks, queries, targets, k):
+    provider = get_embedding_provider(name)
+    provider(["warmup"])
+
+    start = time.perf_counter()
+    doc_vectors = np.asarray(provider(chunks), dtype=np.float32)
+    ingest_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    query_vectors = np.asarray([provider([q])[0] for q in queries], dtype=np.float32)
+    query_seconds = time.perf_counter() - start
+
+    doc_vectors /= np.linalg.norm(doc_vectors, axis=1, keepdims=True)
+    query_vectors /= np.linalg.norm(query_vectors, axis=1, keepdims=True)
+    similarities = query_vectors @ doc_vectors.T
+    top_k = np.argsort(-similarities, axis=1)[:, :k]
+    hits = sum(target in row for target, row in zip(targets, top_k))
+
+    rows = np.arange(len(targets))
+    match = similarities[rows, targets]
+    similarities[rows, targets] = -np.inf
+    best_other = similarities.max(axis=1)
+
+    return {
+        "provider": provider.version,
+        "dimension": provider.dimension,
+        "chunks_per_s": len(chunks) / ingest_seconds,
+        "query_ms": 1000 * query_seconds / len(queries),
+        "recall": hits / len(queries),
+        "match_pct": np.percentile(match, [10, 50, 90]),
+        "other_pct": np.percentile(best_other, [10, 50, 90]),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding providers on the transcripts.")
+    parser.add_argument("--providers", nargs="+", default=["default", "onnx"], choices=list(PROVIDERS))
+    parser.add_argument("--chunks", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--query-length", type=int, default=200)
+    parser.add_argument("-k", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    chunks = load_chunks(args.chunks)
+    if not chunks:
+        print(f"No transcripts found in {TRANSCRIPT_DIR}")
+        return
+    queries, targets = make_queries(chunks, args.queries, args.query_length, args.seed)
+    print(f"Benchmarking on {len(chunks)} chunks, {len(queries)} queries, k={args.k}\n")
+
+    print(f"{'provider':<45} {'dim':>5} {'chunks/s':>10} {'query ms':>10} {'recall@' + str(args.k):>10}")
+    for name in args.providers:
+        try:
+            r = benchmark(name, chunks, queries, targets, args.k)
+        except Exception as e:
+            print(f"{name:<45} failed: {e}")
+            continue
+        print(f"{r['provider']:<45} {r['dimension']:>5} {r['chunks_per_s']:>10.1f} {r['query_ms']:>10.2f} {r['recall']:>10.3f}")
+        print(f"{'  similarity p10/p50/p90 matching chunk':<45} {'/'.join(f'{v:.2f}' for v in r['match_pct'])}")
+        print(f"{'  similarity p10/p50/p90 best other chunk':<45} {'/'.join(f'{v:.2f}' for v in r['other_pct'])}")
+
+if __name__ == "__main__":
+    main()
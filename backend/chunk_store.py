@@ -0,0 +1,159 @@
+import mmap
+import os
+import uuid
+from typing import Dict, List
+
+import numpy as np
+
+# One fixed-size record per chunk; the chunk id is the record's position in the index.
+INDEX_DTYPE = np.dtype([
+    ("offset", "<u8"),       # byte offset of the chunk in chunks.bin
+    ("length", "<u4"),       # byte length of the UTF-8 encoded chunk
+    ("source", "<u4"),       # line number of the transcript name in sources.txt
+    ("chunk_index", "<u4"),  # character offset of the chunk within its transcript
+])
+
+
+class ChunkStore:
+    """Append-only on-disk store for transcript chunks.
+
+    Layout of the store directory:
+      chunks.bin   - all chunk text, UTF-8, back to back
+      chunks.idx   - INDEX_DTYPE records, one per chunk
+      sources.txt  - transcript file names, one per line
+      store_id     - random id, regenerated by clear(); stamped on the vector
+                     collection so vectors are never paired with another store's ids
+
+    Text and index are memory-mapped, so resident memory does not grow with the
+    library; a chunk is only decoded when it is actually needed. Files are only
+    ever appended to or replaced, never truncated, so other processes (the API
+    server while ingest.py runs) can keep reading and pick up new chunks on the
+    next refresh().
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.text_path = os.path.join(path, "chunks.bin")
+        self.index_path = os.path.join(path, "chunks.idx")
+        self.sources_path = os.path.join(path, "sources.txt")
+        self.store_id_path = os.path.join(path, "store_id")
+        for file_path in (self.text_path, self.index_path, self.sources_path):
+            open(file_path, "ab").close()
+        if not os.path.exists(self.store_id_path):
+            self._write_store_id()
+        self._remap()
+
+    def _write_store_id(self):
+        tmp_path = self.store_id_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(uuid.uuid4().hex)
+        os.replace(tmp_path, self.store_id_path)
+
+    def _file_state(self):
+        # Inode and size of each file: changes on append (size) and on clear() (new inode)
+        return tuple((s.st_ino, s.st_size) for s in map(os.stat, (self.text_path, self.index_path, self.sources_path)))
+
+    def _remap(self):
+        # Old maps are dropped rather than closed: memoryviews handed out by view() may still reference them
+        self._state = self._file_state()
+        with open(self.store_id_path, "r") as f:
+            self.store_id = f.read().strip()
+        with open(self.sources_path, "r", encoding="utf-8") as f:
+            self.sources = f.read().splitlines()
+        self._source_ids: Dict[str, int] = {name: i for i, name in enumerate(self.sources)}
+
+        self._text = None
+        self._index = np.empty(0, dtype=INDEX_DTYPE)
+        if os.path.getsize(self.text_path):
+            with open(self.text_path, "rb") as f:
+                self._text = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        # A trailing partial record left by an interrupted append is ignored (and overwritten by the next append)
+        count = os.path.getsize(self.index_path) // INDEX_DTYPE.itemsize
+        if count:
+            self._index = np.memmap(self.index_path, dtype=INDEX_DTYPE, mode="r", shape=(count,))
+
+    def refresh(self):
+        """Remap if another process appended to or cleared the store. Call once per batch of lookups."""
+        if self._file_state() != self._state:
+            self._remap()
+
+    def _ensure_mapped(self, chunk_id: int):
+        # Cheap per-lookup check: only ids past the mapped index trigger a remap
+        if chunk_id >= len(self._index):
+            self._remap()
+
+    def __len__(self) -> int:
+        self.refresh()
+        return len(self._index)
+
+    def append(self, documents: List[str], metadatas: List[dict]) -> List[int]:
+        """Append chunks and return their numeric ids."""
+        if not documents:
+            return []
+        self.refresh()
+
+        new_sources = []
+        records = np.empty(len(documents), dtype=INDEX_DTYPE)
+        offset = os.path.getsize(self.text_path)
+        blobs = []
+        for i, (document, metadata) in enumerate(zip(documents, metadatas)):
+            source = metadata["source"]
+            if source not in self._source_ids:
+                self._source_ids[source] = len(self.sources)
+                self.sources.append(source)
+                new_sources.append(source)
+            blob = document.encode("utf-8")
+            records[i] = (offset, len(blob), self._source_ids[source], metadata.get("chunk_index", 0))
+            offset += len(blob)
+            blobs.append(blob)
+
+        # Names and text before index, so an interrupted append never leaves a record
+        # pointing past the blob. A chunk only exists once its index record is written.
+        with open(self.sources_path, "a", encoding="utf-8") as f:
+            f.writelines(f"{source}\n" for source in new_sources)
+        with open(self.text_path, "ab") as f:
+            f.writelines(blobs)
+        first_id = len(self._index)
+        with open(self.index_path, "r+b") as f:
+            f.seek(first_id * INDEX_DTYPE.itemsize)
+            f.write(records.tobytes())
+
+        self._remap()
+        return list(range(first_id, first_id + len(documents)))
+
+    def last_chunk_ids(self) -> Dict[str, int]:
+        """{source: id of its most recently committed chunk} for every source in the index."""
+        self.refresh()
+        sources = np.asarray(self._index["source"])
+        if not len(sources):
+            return {}
+        # np.unique reports first occurrences, so search the reversed array for the last ones
+        unique, first_from_end = np.unique(sources[::-1], return_index=True)
+        last = len(sources) - 1 - first_from_end
+        return {self.sources[int(s)]: int(i) for s, i in zip(unique, last)}
+
+    def view(self, chunk_id: int) -> memoryview:
+        """Zero-copy view of the chunk's UTF-8 bytes."""
+        self._ensure_mapped(chunk_id)
+        record = self._index[chunk_id]
+        start = int(record["offset"])
+        return memoryview(self._text)[start:start + int(record["length"])]
+
+    def get(self, chunk_id: int) -> str:
+        return str(self.view(chunk_id), "utf-8")
+
+    def metadata(self, chunk_id: int) -> dict:
+        self._ensure_mapped(chunk_id)
+        record = self._index[chunk_id]
+        return {"source": self.sources[int(record["source"])], "chunk_index": int(record["chunk_index"])}
+
+    def clear(self):
+        # Swap in empty files instead of truncating: other processes may still have the old ones mapped.
+        # Index first, so no record ever points into an emptied blob.
+        for file_path in (self.index_path, self.text_path, self.sources_path):
+            tmp_path = file_path + ".tmp"
+            open(tmp_path, "wb").close()
+            os.replace(tmp_path, file_path)
+        self._write_store_id()
+        self._remap()
@@ -0,0 +1,223 @@
+import hashlib
+import os
+import re
+from typing import List, Optional
+
+import numpy as np
+from chromadb import Documents, EmbeddingFunction, Embeddings
+from chromadb.utils import embedding_functions
+
+# Which embedding backend RAGService uses. One of the keys in PROVIDERS below.
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "default")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+
+# all-MiniLM-L6-v2 is what Chroma ships with, so every local backend defaults to it
+# and only differs in how it is executed.
+MINILM_MODEL = "all-MiniLM-L6-v2"
+MINILM_DIMENSION = 384
+ONNX_MODEL_DIR = os.getenv(
+    "EMBEDDING_ONNX_MODEL_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "chroma", "onnx_models", MINILM_MODEL, "onnx"),
+)
+
+
+class EmbeddingProvider(EmbeddingFunction):
+    """Base class for embedding backends.
+
+    Each provider is a Chroma embedding function that also carries a stamp
+    (provider, model, variant, dimension). The stamp is stored on the collection so
+    vectors from different backends are never mixed in the same index.
+    """
+
+    provider = "base"
+    model = ""
+    variant = ""
+    dimension = 0
+
+    def __init__(self, batch_size: int = EMBEDDING_BATCH_SIZE):
+        self.batch_size = batch_size
+
+    def __call__(self, input: Documents) -> Embeddings:
+        embeddings = []
+        for start in range(0, len(input), self.batch_size):
+            embeddings.extend(self.embed_batch(list(input[start:start + self.batch_size])))
+        return embeddings
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        raise NotImplementedError
+
+    @property
+    def version(self) -> str:
+        return f"{self.provider}:{self.model}:{self.variant}"
+
+    def collection_name(self, base_name: str) -> str:
+        # Chroma collection names allow [a-zA-Z0-9._-] and at most 63 characters
+        slug = re.sub(r"[^a-zA-Z0-9._-]", "-", f"{self.provider}_{self.model}_{self.variant}")
+        name = f"{base_name}_{slug}"
+        if len(name) > 63:
+            # Keep truncated names unique per version
+            digest = hashlib.sha1(self.version.encode("utf-8")).hexdigest()[:8]
+            name = f"{name[:54].rstrip('._-')}-{digest}"
+        return name
+
+    def collection_metadata(self) -> dict:
+        return {
+            "embedding_provider": self.provider,
+            "embedding_version": self.version,
+            "embedding_dimension": self.dimension,
+        }
+
+
+class ChromaDefaultEmbeddingProvider(EmbeddingProvider):
+    """Chroma's built-in ONNX all-MiniLM-L6-v2 (fp32), the model the original
+    `zouk_transcripts` collection was built with. It stores into the plain
+    `zouk_chunks` collection, so existing installs need to re-run ingest.py."""
+
+    provider = "default"
+    model = MINILM_MODEL
+    variant = "fp32"
+    dimension = MINILM_DIMENSION
+
+    def __init__(self, batch_size: int = EMBEDDING_BATCH_SIZE):
+        super().__init__(batch_size)
+        self._ef = embedding_functions.DefaultEmbeddingFunction()
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        return [list(map(float, e)) for e in self._ef(texts)]
+
+    def collection_name(self, base_name: str) -> str:
+        return base_name
+
+
+class OnnxEmbeddingProvider(EmbeddingProvider):
+    """all-MiniLM-L6-v2 on onnxruntime's CPU provider with int8 dynamic quantization.
+
+    The fp32 model is the one Chroma downloads for its default embedding function.
+    On first use it is quantized once with onnxruntime and cached next to it.
+    """
+
+    provider = "onnx"
+    model = MINILM_MODEL
+    dimension = MINILM_DIMENSION
+    max_length = 256
+
+    def __init__(self, batch_size: int = EMBEDDING_BATCH_SIZE, model_dir: str = ONNX_MODEL_DIR, quantize: bool = True):
+        super().__init__(batch_size)
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.variant = "int8" if quantize else "fp32"
+        model_path = os.path.join(model_dir, "model.onnx")
+        if not os.path.exists(model_path):
+            # Let Chroma fetch the model into its cache on first run
+            embedding_functions.DefaultEmbeddingFunction()(["warmup"])
+        if quantize:
+            model_path = self._quantize(model_path)
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.max_length)
+        self.tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        threads = int(os.getenv("EMBEDDING_ONNX_THREADS", "0"))
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+    @staticmethod
+    def _quantize(model_path: str) -> str:
+        quantized_path = os.path.splitext(model_path)[0] + ".int8.onnx"
+        if not os.path.exists(quantized_path):
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            print(f"Quantizing {model_path} to int8...")
+            # Write to a per-process temp file and swap it in, so a process starting at the
+            # same time (API server and ingest.py) never loads a half-written model
+            tmp_path = f"{quantized_path}.{os.getpid()}.tmp"
+            quantize_dynamic(model_path, tmp_path, weight_type=QuantType.QInt8)
+            os.replace(tmp_path, quantized_path)
+        return quantized_path
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        encoded = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encoded], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encoded], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+        last_hidden_state = self.session.run(None, feeds)[0]
+        # Mean pooling over real tokens, then L2 normalize (same as sentence-transformers)
+        mask = attention_mask[:, :, None].astype(np.float32)
+        pooled = (last_hidden_state * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.astype(np.float32).tolist()
+
+
+class SentenceTransformerEmbeddingProvider(EmbeddingProvider):
+    """Batched sentence-transformers on CPU (`pip install sentence-transformers`)."""
+
+    provider = "sentence-transformers"
+    variant = "fp32"
+
+    def __init__(self, batch_size: int = EMBEDDING_BATCH_SIZE, model: Optional[str] = None):
+        super().__init__(batch_size)
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise ImportError("sentence-transformers is not installed. Run `pip install sentence-transformers`.")
+
+        self.model = model or os.getenv("EMBEDDING_ST_MODEL", MINILM_MODEL)
+        self._model = SentenceTransformer(self.model, device="cpu")
+        self.dimension = self._model.get_sentence_embedding_dimension()
+
+    def __call__(self, input: Documents) -> Embeddings:
+        # sentence-transformers batches internally (and sorts by length), so hand it everything
+        return self.embed_batch(list(input))
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        return self._model.encode(
+            texts,
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+        ).tolist()
+
+
+class GeminiEmbeddingProvider(EmbeddingProvider):
+    """Remote embeddings from the Gemini API. No local compute, but every call is a round-trip."""
+
+    provider = "gemini"
+    variant = "api"
+    # The embed_content endpoint accepts at most 100 texts per request
+    max_batch_size = 100
+
+    def __init__(self, batch_size: int = EMBEDDING_BATCH_SIZE, model: Optional[str] = None):
+        super().__init__(min(batch_size, self.max_batch_size))
+        from google import genai
+
+        self.client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+        self.model = model or os.getenv("EMBEDDING_GEMINI_MODEL", "text-embedding-004")
+        # The dimension depends on the model (e.g. 768 for text-embedding-004, 3072 for gemini-embedding-001)
+        self.dimension = len(self.embed_batch(["dimension probe"])[0])
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        response = self.client.models.embed_content(model=self.model, contents=texts)
+        return [list(e.values) for e in response.embeddings]
+
+
+PROVIDERS = {
+    "default": ChromaDefaultEmbeddingProvider,
+    "onnx": OnnxEmbeddingProvider,
+    "sentence-transformers": SentenceTransformerEmbeddingProvider,
+    "gemini": GeminiEmbeddingProvider,
+}
+
+
+def get_embedding_provider(name: Optional[str] = None) -> EmbeddingProvider:
+    name = name or EMBEDDING_PROVIDER
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown embedding provider '{name}'. Available: {', '.join(PROVIDERS)}")
+    return PROVIDERS[name]()
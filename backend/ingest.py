@@ -7,9 +7,21 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 # Transcripts are in ../bric_transcripts relative to backend/
 TRANSCRIPT_DIR = os.path.join(BASE_DIR, "..", "bric_transcripts") 
 
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
+def chunk_text(content, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
+    # Simple chunking: split by paragraphs or just take snippets if files are small.
+    # Given these are transcripts, they might be continuous.
+    # Let's chunk by 1000 characters for now with overlap.
+    # Yields (offset, chunk) pairs.
+    for i in range(0, len(content), chunk_size - overlap):
+        yield i, content[i:i + chunk_size]
+
 def ingest_transcripts():
     print("Starting ingestion...")
     rag_service = RAGService()
+    print(f"Embedding with {rag_service.embedding_provider.version} into '{rag_service.collection_name}'")
     
     # Find all txt files
     file_pattern = os.path.join(TRANSCRIPT_DIR, "*.txt")
@@ -19,37 +31,34 @@ def ingest_transcripts():
         print(f"No files found in {TRANSCRIPT_DIR}")
         return
 
-    documents = []
-    metadatas = []
-    ids = []
+    total_chunks = 0
+    ingested = rag_service.ingested_sources()
 
+    # Ingest one transcript at a time so only a single file's chunks are held in memory
     for file_path in files:
         filename = os.path.basename(file_path)
+        if filename in ingested:
+            print(f"Skipping {filename}, already ingested.")
+            continue
+
         try:
             with open(file_path, "r", encoding="utf-8") as f:
                 content = f.read()
             
-            # Simple chunking: split by paragraphs or just take snippets if files are small.
-            # Given these are transcripts, they might be continuous.
-            # Let's chunk by 1000 characters for now with overlap.
-            chunk_size = 1000
-            overlap = 200
-            
-            for i in range(0, len(content), chunk_size - overlap):
-                chunk = content[i:i + chunk_size]
-                chunk_id = f"{filename}_{i}"
-                
+            documents = []
+            metadatas = []
+            for i, chunk in chunk_text(content):
                 documents.append(chunk)
                 metadatas.append({"source": filename, "chunk_index": i})
-                ids.append(chunk_id)
+
+            rag_service.add_documents(documents, metadatas)
+            total_chunks += len(documents)
                 
         except Exception as e:
-            print(f"Error reading {filename}: {e}")
+            print(f"Error ingesting {filename}: {e}")
 
-    # Add to Chroma
-    if documents:
-        print(f"Adding {len(documents)} chunks to Vector Store...")
-        rag_service.add_documents(documents, metadatas, ids)
+    if total_chunks:
+        print(f"Added {total_chunks} chunks to Vector Store.")
         print("Ingestion complete.")
     else:
         print("No content to ingest.")
@@ -1,43 +1,164 @@
 import chromadb
 from chromadb.utils import embedding_functions
 import os
-from typing import List
+import time
+from typing import List, Optional
+import numpy as np
 import google.generativeai as genai
 
+try:
+    from .chunk_store import ChunkStore
+    from .embeddings import EmbeddingProvider, get_embedding_provider
+except ImportError:
+    # Running as a script from backend/ (e.g. ingest.py)
+    from chunk_store import ChunkStore
+    from embeddings import EmbeddingProvider, get_embedding_provider
+
 # Initialize ChromaDB
 # For simplicity, using persistent client in a local folder
 CHROMA_DATA_PATH = "chroma_db"
+# Chunk text lives in the memory-mapped chunk store; the Chroma collection only holds
+# vectors keyed by the store's numeric chunk ids.
+CHUNK_STORE_PATH = "chunk_store"
+COLLECTION_NAME = "zouk_chunks"
+
+# Adaptive retrieval: fetch RAG_CANDIDATES nearest chunks, drop weak and redundant ones,
+# and return as many as fit in RAG_CONTEXT_CHARS (at most RAG_MAX_RESULTS).
+RAG_CANDIDATES = int(os.getenv("RAG_CANDIDATES", "12"))
+RAG_MAX_RESULTS = int(os.getenv("RAG_MAX_RESULTS", "6"))
+RAG_CONTEXT_CHARS = int(os.getenv("RAG_CONTEXT_CHARS", "4000"))
+# Cosine similarity a chunk needs to be used at all, and how far below the best hit it may fall.
+# If no candidate clears the floor the query gets no context. Check the values against the
+# similarity percentiles printed by benchmark_embeddings.py for your provider.
+RAG_MIN_SIMILARITY = float(os.getenv("RAG_MIN_SIMILARITY", "0.3"))
+RAG_RELATIVE_MARGIN = float(os.getenv("RAG_RELATIVE_MARGIN", "0.15"))
+# MMR trade-off between relevance (1.0) and diversity (0.0). Chunks overlap by 200 characters,
+# so neighbours of an already selected chunk above RAG_REDUNDANCY similarity are skipped outright.
+RAG_MMR_LAMBDA = float(os.getenv("RAG_MMR_LAMBDA", "0.7"))
+RAG_REDUNDANCY = float(os.getenv("RAG_REDUNDANCY", "0.9"))
 
 class RAGService:
-    def __init__(self):
+    def __init__(self, embedding_provider: Optional[EmbeddingProvider] = None):
         self.client = chromadb.PersistentClient(path=CHROMA_DATA_PATH)
-        
-        # Retrieve or create collection
-        # We can use Google's embedding model or a default one. 
-        # For simplicity and speed, let's use the default all-MiniLM-L6-v2 which Chroma provides by default if no ef is specified.
-        # But for better performance with Gemini, we might want to use Gemini embeddings.
-        # For now, default sentence-transformers is fine and easier to set up without extra API calls for embeddings.
-        self.collection = self.client.get_or_create_collection(name="zouk_transcripts")
-
-    def add_documents(self, documents: List[str], metadatas: List[dict], ids: List[str]):
+
+        # The embedding backend is chosen with EMBEDDING_PROVIDER (see embeddings.py).
+        # "default" is Chroma's built-in all-MiniLM-L6-v2 and uses the plain collection name;
+        # every other provider gets its own collection (and chunk store) so vectors are never mixed.
+        self.embedding_provider = embedding_provider or get_embedding_provider()
+        self.collection_name = self.embedding_provider.collection_name(COLLECTION_NAME)
+        self.chunk_store = ChunkStore(os.path.join(CHUNK_STORE_PATH, self.collection_name))
+        self.collection = self._get_collection()
+
+    def _get_collection(self):
+        # list_collections returns names in newer Chroma versions and Collection objects in older ones
+        existing = [c if isinstance(c, str) else c.name for c in self.client.list_collections()]
+        if self.collection_name not in existing:
+            # Stamp only on create, so an existing collection's stamp is never overwritten
+            return self.client.create_collection(
+                name=self.collection_name,
+                embedding_function=self.embedding_provider,
+                metadata={**self.embedding_provider.collection_metadata(), "chunk_store_id": self.chunk_store.store_id}
+            )
+
+        collection = self.client.get_collection(
+            name=self.collection_name,
+            embedding_function=self.embedding_provider
+        )
+        metadata = collection.metadata or {}
+        stamped_version = metadata.get("embedding_version")
+        stamped_dimension = metadata.get("embedding_dimension")
+        if (stamped_version and stamped_version != self.embedding_provider.version) or \
+                (stamped_dimension and stamped_dimension != self.embedding_provider.dimension):
+            raise ValueError(
+                f"Collection '{self.collection_name}' was built with {stamped_version} ({stamped_dimension} dims), "
+                f"not {self.embedding_provider.version} ({self.embedding_provider.dimension} dims). "
+                f"Re-ingest or switch EMBEDDING_PROVIDER."
+            )
+        # Vector ids are positions in the chunk store, so they are only meaningful for the store they were built from
+        stamped_store_id = metadata.get("chunk_store_id")
+        if stamped_store_id != self.chunk_store.store_id:
+            raise ValueError(
+                f"Collection '{self.collection_name}' was built from chunk store {stamped_store_id}, "
+                f"but {self.chunk_store.path} is {self.chunk_store.store_id}. "
+                f"Delete the collection and re-run ingest.py."
+            )
+        return collection
+
+    def add_documents(self, documents: List[str], metadatas: List[dict]) -> List[int]:
         if not documents:
-            return
-        self.collection.add(
-            documents=documents,
-            metadatas=metadatas,
-            ids=ids
+            return []
+        # Embed before appending so a failed embedding call writes nothing. If collection.upsert
+        # fails, the appended chunks stay without vectors and ingested_sources() leaves the source out.
+        embeddings = self.embedding_provider(documents)
+        chunk_ids = self.chunk_store.append(documents, metadatas)
+        self.collection.upsert(
+            ids=[str(chunk_id) for chunk_id in chunk_ids],
+            embeddings=embeddings
         )
+        return chunk_ids
 
-    def query(self, query_text: str, n_results: int = 3) -> List[str]:
+    def ingested_sources(self) -> set:
+        # A source counts as ingested once the vector of its latest committed chunk is in the collection
+        last_ids = self.chunk_store.last_chunk_ids()
+        if not last_ids:
+            return set()
+        present = set(self.collection.get(ids=[str(i) for i in last_ids.values()], include=[])['ids'])
+        return {source for source, chunk_id in last_ids.items() if str(chunk_id) in present}
+
+    def query(self, query_text: str, max_results: int = RAG_MAX_RESULTS) -> List[str]:
+        start = time.perf_counter()
+        query_embedding = np.asarray(self.embedding_provider([query_text])[0], dtype=np.float32)
         results = self.collection.query(
-            query_texts=[query_text],
-            n_results=n_results
+            query_embeddings=[query_embedding.tolist()],
+            n_results=RAG_CANDIDATES,
+            include=["embeddings"]
+        )
+        # results['ids'] is a list of lists (one list per query)
+        if not results or not results['ids'] or not results['ids'][0]:
+            print(f"RAG query: 0/0 chunks, empty collection, {(time.perf_counter() - start) * 1000:.1f} ms")
+            return []
+        candidate_ids = [int(chunk_id) for chunk_id in results['ids'][0]]
+
+        # Cosine similarities, so thresholds mean the same thing whatever distance the collection uses
+        embeddings = np.asarray(results['embeddings'][0], dtype=np.float32)
+        embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        query_embedding /= max(float(np.linalg.norm(query_embedding)), 1e-12)
+        relevance = embeddings @ query_embedding
+        similarity = embeddings @ embeddings.T
+        # Pick up chunks ingested by another process since the last query
+        self.chunk_store.refresh()
+
+        threshold = max(RAG_MIN_SIMILARITY, float(relevance.max()) - RAG_RELATIVE_MARGIN)
+        remaining = [i for i in range(len(candidate_ids)) if relevance[i] >= threshold]
+        selected = []
+        documents = []
+        context_chars = 0
+        while remaining and len(selected) < max_results:
+            # Maximal marginal relevance: relevant to the query, unlike what is already selected
+            redundancy = [float(similarity[i, selected].max()) if selected else 0.0 for i in remaining]
+            scores = [RAG_MMR_LAMBDA * relevance[i] - (1 - RAG_MMR_LAMBDA) * r for i, r in zip(remaining, redundancy)]
+            best = int(np.argmax(scores))
+            candidate = remaining.pop(best)
+            if redundancy[best] >= RAG_REDUNDANCY:
+                continue
+
+            document = self.chunk_store.get(candidate_ids[candidate])
+            # Always allow the best chunk, even if it alone exceeds the budget; skip others that don't fit
+            if documents and context_chars + len(document) > RAG_CONTEXT_CHARS:
+                continue
+            selected.append(candidate)
+            documents.append(document)
+            context_chars += len(document)
+
+        print(
+            f"RAG query: {len(documents)}/{len(candidate_ids)} chunks, {context_chars} chars, "
+            f"best similarity {float(relevance.max()):.3f}, threshold {threshold:.3f}, "
+            f"{(time.perf_counter() - start) * 1000:.1f} ms"
         )
-        # results['documents'] is a list of lists (one list per query)
-        if results and results['documents']:
-            return results['documents'][0]
-        return []
+        return documents
 
     def clear_collection(self):
-        self.client.delete_collection("zouk_transcripts")
-        self.collection = self.client.get_or_create_collection(name="zouk_transcripts")
+        self.client.delete_collection(self.collection_name)
+        # Clear the store first: the new collection is stamped with its new id
+        self.chunk_store.clear()
+        self.collection = self._get_collection()
@@ -5,6 +5,7 @@ import requests
 import subprocess
 from dotenv import load_dotenv
 from playwright.sync_api import sync_playwright
+from media_pipeline import MediaPipeline
 class ZoukScraper:
     def __init__(self):
         load_dotenv()
@@ -14,6 +15,8 @@ class ZoukScraper:
         self.output_dir = "bric_video_downloads"
         self.target_level = 1
         os.makedirs(self.output_dir, exist_ok=True)
+        # Extracts audio and drops duplicate lessons in the background while scraping continues
+        self.media_pipeline = MediaPipeline(audio_dir="bric_audio")
         # Cookies and LocalStorage captured from browser session
         self.cookies = [
             {"name": "XSRF-TOKEN", "value": "1768505472|ZnissiXXvULb", "domain": ".brgalhardo.com", "path": "/"},
@@ -303,12 +306,16 @@ class ZoukScraper:
                     if video_url:
                         filename = f"Level_{self.target_level}_{i+1:02d}_{self.sanitize_filename(lesson_title)}.mp4"
                         
-                        # Skip if already downloaded
-                        if os.path.exists(os.path.join(self.output_dir, filename)):
+                        video_path = os.path.join(self.output_dir, filename)
+                        
+                        # Skip if already downloaded (still queue it so missing audio gets extracted)
+                        if os.path.exists(video_path):
                             print("  Skipping (already exists).")
+                            self.media_pipeline.submit(video_path)
                             continue
                         
-                        self.download_with_ytdlp(video_url, filename)
+                        if self.download_with_ytdlp(video_url, filename):
+                            self.media_pipeline.submit(video_path)
                     else:
                         print("  No video URL intercepted for this lesson.")
                         
@@ -319,6 +326,9 @@ class ZoukScraper:
             page.remove_listener("response", handle_response)
             browser.close()
 
+        print("Waiting for audio extraction to finish...")
+        self.media_pipeline.close()
+
 if __name__ == "__main__":
     scraper = ZoukScraper()
     scraper.run()
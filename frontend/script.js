@@ -5,7 +5,16 @@ const fileUpload = document.getElementById('file-upload');
 const historyList = document.getElementById('history-list');
 
 // State
-let history = []; // Chat history for context
+const HISTORY_WINDOW = 10; // History entries sent with each request (5 user/model turns)
+const MAX_RENDERED_MESSAGES = 50; // Messages kept in the DOM; older ones are re-rendered on demand
+const LOAD_EARLIER_PAGE = 20;
+
+let history = []; // Chat history for context, bounded to HISTORY_WINDOW
+const messages = []; // Every message in this session: { text, type, sources, html }
+let firstRenderedIndex = 0; // Index in messages of the oldest message currently in the DOM
+let loadEarlierBtn = null;
+let showingEarlier = false; // Earlier pages were loaded on request; don't trim them until the user scrolls back down
+let programmaticScroll = false;
 
 // Initialize
 messageInput.focus();
@@ -57,9 +66,12 @@ async function sendMessage() {
         // Add Bot Message
         addMessage(data.response, 'bot', data.sources);
 
-        // Update History
+        // Update History (only the most recent turns are kept, so the payload stays constant)
         history.push({ role: "user", parts: [text] });
         history.push({ role: "model", parts: [data.response] });
+        if (history.length > HISTORY_WINDOW) {
+            history.splice(0, history.length - HISTORY_WINDOW);
+        }
 
     } catch (error) {
         removeMessage(loadingId);
@@ -70,43 +82,145 @@ async function sendMessage() {
 
 // UI Helpers
 function addMessage(text, type, sources = []) {
+    messages.push({ text, type, sources, html: null });
+    const div = renderMessage(messages.length - 1);
+
+    chatContainer.appendChild(div);
+    if (!showingEarlier) {
+        trimRenderedMessages();
+    }
+
+    scrollToBottom();
+    return div;
+}
+
+function scrollToBottom() {
+    const bottom = chatContainer.scrollHeight - chatContainer.clientHeight;
+    // Only a real change fires a scroll event, so only then mark it as ours
+    if (Math.abs(chatContainer.scrollTop - bottom) > 1) {
+        programmaticScroll = true;
+        chatContainer.scrollTop = bottom;
+    }
+}
+
+function renderMessage(index) {
+    const message = messages[index];
     const div = document.createElement('div');
-    div.className = `message ${type}`;
-
-    // Markdown parsing using marked.js
-    const formattedText = marked.parse(text);
-
-    let sourceHtml = '';
-    if (sources && sources.length > 0) {
-        sourceHtml = `
-        <details class="sources-dropdown">
-            <summary>View ${sources.length} Sources</summary>
-            <div class="sources-list">
-                ${sources.join('<br>')}
-            </div>
-        </details>`;
+    div.className = `message ${message.type}`;
+    div.dataset.index = index;
+
+    // Markdown parsing using marked.js, cached so re-rendered messages are not parsed again
+    if (message.html === null) {
+        message.html = marked.parse(message.text);
     }
 
-    const avatarIcon = type === 'user' ? 'user' : 'bot';
+    const avatarIcon = message.type === 'user' ? 'user' : 'bot';
 
     div.innerHTML = `
         <div class="avatar"><i data-lucide="${avatarIcon}" size="20"></i></div>
         <div class="message-content">
-            ${formattedText}
-            ${sourceHtml}
+            ${message.html}
         </div>
     `;
 
-    chatContainer.appendChild(div);
+    if (message.sources && message.sources.length > 0) {
+        div.querySelector('.message-content').appendChild(renderSources(message.sources));
+    }
+
     lucide.createIcons({
         root: div
     });
-
-    // Scroll to bottom
-    chatContainer.scrollTop = chatContainer.scrollHeight;
     return div;
 }
 
+function renderSources(sources) {
+    const details = document.createElement('details');
+    details.className = 'sources-dropdown';
+
+    const summary = document.createElement('summary');
+    summary.textContent = `View ${sources.length} Sources`;
+    details.appendChild(summary);
+
+    // Sources are only put in the DOM the first time the dropdown is opened
+    details.addEventListener('toggle', () => {
+        if (!details.open || details.querySelector('.sources-list')) return;
+        const list = document.createElement('div');
+        list.className = 'sources-list';
+        for (const source of sources) {
+            const item = document.createElement('div');
+            item.className = 'source-item';
+            item.textContent = source;
+            list.appendChild(item);
+        }
+        details.appendChild(list);
+    });
+
+    return details;
+}
+
+// Keep at most MAX_RENDERED_MESSAGES in the DOM so long sessions don't slow down the page
+function trimRenderedMessages() {
+    const rendered = chatContainer.querySelectorAll('.message[data-index]');
+    const excess = rendered.length - MAX_RENDERED_MESSAGES;
+    if (excess > 0) {
+        // Removing nodes above the viewport shifts the content up; compensate so nothing jumps
+        const previousHeight = chatContainer.scrollHeight;
+        for (let i = 0; i < excess; i++) {
+            rendered[i].remove();
+        }
+        firstRenderedIndex = Number(rendered[excess].dataset.index);
+        programmaticScroll = true;
+        chatContainer.scrollTop -= previousHeight - chatContainer.scrollHeight;
+    }
+    updateLoadEarlierButton();
+}
+
+// Once the user scrolls back to the latest messages, the earlier pages can go again
+chatContainer.addEventListener('scroll', () => {
+    if (programmaticScroll) {
+        programmaticScroll = false;
+        return;
+    }
+    const atBottom = chatContainer.scrollHeight - chatContainer.scrollTop - chatContainer.clientHeight < 50;
+    if (showingEarlier && atBottom) {
+        showingEarlier = false;
+        trimRenderedMessages();
+    }
+});
+
+function loadEarlierMessages() {
+    const start = Math.max(0, firstRenderedIndex - LOAD_EARLIER_PAGE);
+    const fragment = document.createDocumentFragment();
+    for (let i = start; i < firstRenderedIndex; i++) {
+        fragment.appendChild(renderMessage(i));
+    }
+
+    // Keep the current messages where they are on screen
+    const previousHeight = chatContainer.scrollHeight;
+    loadEarlierBtn.after(fragment);
+    programmaticScroll = true;
+    chatContainer.scrollTop += chatContainer.scrollHeight - previousHeight;
+
+    firstRenderedIndex = start;
+    showingEarlier = true;
+    updateLoadEarlierButton();
+}
+
+function updateLoadEarlierButton() {
+    if (firstRenderedIndex === 0) {
+        if (loadEarlierBtn) loadEarlierBtn.style.display = 'none';
+        return;
+    }
+    if (!loadEarlierBtn) {
+        loadEarlierBtn = document.createElement('button');
+        loadEarlierBtn.className = 'load-earlier';
+        loadEarlierBtn.addEventListener('click', loadEarlierMessages);
+        chatContainer.prepend(loadEarlierBtn);
+    }
+    loadEarlierBtn.textContent = `Show ${firstRenderedIndex} earlier messages`;
+    loadEarlierBtn.style.display = '';
+}
+
 function addLoadingMessage() {
     const id = 'loading-' + Date.now();
     const div = document.createElement('div');
@@ -120,7 +234,7 @@ function addLoadingMessage() {
     `;
     chatContainer.appendChild(div);
     lucide.createIcons({ root: div });
-    chatContainer.scrollTop = chatContainer.scrollHeight;
+    scrollToBottom();
     return id;
 }
 
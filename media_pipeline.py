@@ -0,0 +1,122 @@
+import os
+import json
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class MediaPipeline:
+    """Post-processing that runs right after each video download.
+
+    For every video an ffmpeg worker writes a compressed mono speech track
+    (Opus, 16 kHz) to `audio_dir` and, in the same decode pass, a SHA-256 of the
+    decoded audio. The hash ignores container and video stream, but it is an
+    exact match: it only catches lessons whose audio decodes bit-identically
+    (the same upload reused under another level). A re-encoded copy or another
+    HLS rendition of the same lesson is not detected. transcribe.py --local
+    then uploads these small audio files straight from disk instead of pulling
+    videos back from Drive.
+    """
+
+    def __init__(self, audio_dir="bric_audio", workers=None, bitrate="24k"):
+        self.audio_dir = audio_dir
+        self.bitrate = bitrate
+        self.fingerprint_path = os.path.join(audio_dir, "fingerprints.json")
+        os.makedirs(self.audio_dir, exist_ok=True)
+
+        self.enabled = shutil.which("ffmpeg") is not None
+        if not self.enabled:
+            print("Warning: ffmpeg not found, skipping audio extraction.")
+
+        # fingerprints: {audio sha256: audio file name} for every unique lesson seen so far
+        # duplicates: {audio file name that was not kept: audio file name it duplicates}
+        self.fingerprints = {}
+        self.duplicates = {}
+        if os.path.exists(self.fingerprint_path):
+            with open(self.fingerprint_path, "r") as f:
+                data = json.load(f)
+            self.fingerprints = data.get("fingerprints", {})
+            self.duplicates = data.get("duplicates", {})
+        self._lock = threading.Lock()
+
+        workers = workers or int(os.getenv("MEDIA_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._futures = []
+
+    def audio_path_for(self, video_path):
+        base_name = os.path.splitext(os.path.basename(video_path))[0]
+        return os.path.join(self.audio_dir, f"{base_name}.ogg")
+
+    def submit(self, video_path):
+        """Queue a downloaded video for audio extraction and return immediately."""
+        if not self.enabled:
+            return None
+        future = self._executor.submit(self.process, video_path)
+        self._futures.append(future)
+        return future
+
+    def process(self, video_path):
+        """Extract audio and fingerprint one video. Returns the audio path, or None for duplicates/errors."""
+        try:
+            return self._process(video_path)
+        except Exception as e:
+            # One bad video (missing file, disk error) must not stop the rest of the queue
+            print(f"Audio extraction failed for {video_path}: {e}")
+            return None
+
+    def _process(self, video_path):
+        audio_path = self.audio_path_for(video_path)
+        audio_name = os.path.basename(audio_path)
+        with self._lock:
+            if audio_name in self.duplicates:
+                return None
+            if audio_name in self.fingerprints.values():
+                return audio_path
+
+        tmp_path = audio_path + ".part.ogg"
+        cmd = [
+            "ffmpeg", "-nostdin", "-loglevel", "error", "-y",
+            "-i", video_path,
+            # Output 1: compressed mono speech track for transcription
+            "-vn", "-ac", "1", "-ar", "16000", "-c:a", "libopus", "-b:a", self.bitrate, "-application", "voip",
+            tmp_path,
+            # Output 2: hash of the decoded audio, printed as "SHA256=<hex>"
+            "-vn", "-ac", "1", "-ar", "16000", "-f", "hash", "-hash", "sha256", "-",
+        ]
+        try:
+            result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+        except subprocess.CalledProcessError as e:
+            print(f"ffmpeg failed for {video_path}: {e.stderr.strip()}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return None
+
+        fingerprint = result.stdout.strip().split("=", 1)[-1]
+        with self._lock:
+            original = self.fingerprints.get(fingerprint)
+            if original and original != audio_name:
+                print(f"  Duplicate lesson: {os.path.basename(video_path)} has the same audio as {original}, skipping.")
+                os.remove(tmp_path)
+                self.duplicates[audio_name] = original
+                self._save()
+                return None
+            os.replace(tmp_path, audio_path)
+            self.fingerprints[fingerprint] = audio_name
+            self._save()
+
+        print(f"  Extracted audio: {audio_path}")
+        return audio_path
+
+    def _save(self):
+        with open(self.fingerprint_path, "w") as f:
+            json.dump({"fingerprints": self.fingerprints, "duplicates": self.duplicates}, f, indent=2)
+
+    def close(self):
+        """Wait for all queued videos to finish."""
+        try:
+            for future in self._futures:
+                future.result()
+        finally:
+            self._futures.clear()
+            self._executor.shutdown(wait=True)
@@ -1,5 +1,6 @@
 import os
 import io
+import sys
 import time
 import assemblyai as aai
 from google.auth.transport.requests import Request
@@ -17,6 +18,8 @@ SCOPES = ['https://www.googleapis.com/auth/drive.readonly']
 FOLDER_ID = os.getenv('GOOGLE_DRIVE_FOLDER_ID')
 API_KEY = os.getenv('ASSEMBLYAI_API_KEY')
 TRANSCRIPT_DIR = "bric_transcripts"
+# Audio extracted by media_pipeline.py during scraping
+AUDIO_DIR = "bric_audio"
 
 # Configure AssemblyAI
 aai.settings.api_key = API_KEY
@@ -72,7 +75,7 @@ def download_file(service, file_id, file_name):
 
 def transcribe_audio(audio_file):
     transcriber = aai.Transcriber()
-    # AssemblyAI accepts a file object (binary)
+    # AssemblyAI accepts a file object (binary) or a local file path
     transcript = transcriber.transcribe(audio_file)
     return transcript
 
@@ -83,7 +86,42 @@ def save_transcript(file_name, transcript_text):
         f.write(transcript_text)
     print(f"Saved transcript to {output_path}")
 
+def transcribe_local():
+    # Upload the small mono audio tracks from disk instead of pulling full videos from Drive.
+    # Duplicate lessons were already dropped by the media pipeline.
+    if not os.path.isdir(AUDIO_DIR):
+        print(f"Error: {AUDIO_DIR} not found. Run bric_scraper.py first.")
+        return
+
+    if not os.path.exists(TRANSCRIPT_DIR):
+        os.makedirs(TRANSCRIPT_DIR)
+
+    files = sorted(f for f in os.listdir(AUDIO_DIR) if f.endswith(".ogg") and not f.endswith(".part.ogg"))
+    print(f"Found {len(files)} audio files.")
+
+    for file_name in files:
+        base_name = os.path.splitext(file_name)[0]
+        if os.path.exists(os.path.join(TRANSCRIPT_DIR, f"{base_name}.txt")):
+             print(f"Skipping {file_name}, transcript already exists.")
+             continue
+
+        print(f"Uploading and transcribing {file_name}...")
+        try:
+            transcript = transcribe_audio(os.path.join(AUDIO_DIR, file_name))
+
+            if transcript.status == aai.TranscriptStatus.error:
+                 print(f"Error transcribing {file_name}: {transcript.error}")
+            else:
+                 save_transcript(file_name, transcript.text)
+
+        except Exception as e:
+            print(f"An error occurred with {file_name}: {e}")
+
 def main():
+    if "--local" in sys.argv:
+        transcribe_local()
+        return
+
     if not FOLDER_ID:
         print("Error: GOOGLE_DRIVE_FOLDER_ID not set in .env")
         return